@@ -10,6 +10,7 @@ from contextlib import contextmanager
 from typing import List, Tuple
 
 # third party imports
+import orjson
 from loguru import logger
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -21,6 +22,12 @@ from hashtheplanet.sql.db_connector import Base, DbConnector, Hash
 
 HASHTHEPLANET_VERSION = "HashThePlanet 0.0.0"
 
+def _compact_json_dumps(obj) -> str:
+    """
+    Serializes JSON columns without whitespace to keep stored rows small.
+    """
+    return orjson.dumps(obj).decode("utf-8")
+
 class HashThePlanet():
     """
     The HashThePlanet class
@@ -31,14 +38,26 @@ class HashThePlanet():
         """
         self._output_file = output_file
         self._input_file = input_file
-        self._engine = create_engine(f"sqlite:///{self._output_file}")
-
-        if not os.path.exists(self._output_file):
+        self._engine = create_engine(
+            f"sqlite:///{self._output_file}",
+            json_serializer=_compact_json_dumps,
+            json_deserializer=orjson.loads,
+        )
+
+        database_exists = os.path.exists(self._output_file)
+        if not database_exists:
             Base.metadata.create_all(self._engine)
 
         self._session = sessionmaker(self._engine)
 
         self._database = DbConnector()
+
+        if database_exists:
+            # the database may come from an older release storing the versions
+            # column in the legacy string format; normalize it before any scan
+            with self.session_scope() as session:
+                self._database.migrate_legacy_versions(session)
+
         self._config = Config()
         self._executor = Executor(self._database, self.session_scope)
 
@@ -68,11 +87,12 @@ class HashThePlanet():
         Prints out all known hashs.
         """
         with self.session_scope() as session:
-            hashs = self._database.get_all_hashs(session)
-            if hashs:
-                for hash_value in hashs:
-                    logger.success(hash_value)
-            else:
+            hash_count = 0
+
+            for hash_value in self._database.get_all_hashs(session):
+                logger.success(hash_value)
+                hash_count += 1
+            if hash_count == 0:
                 logger.info("No hash to display")
 
     def find_hash(self, file_hash):
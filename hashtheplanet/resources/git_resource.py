@@ -2,9 +2,9 @@
 This module handles Git resources to generate hashs.
 """
 # standard imports
-import os
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from stat import S_ISDIR, S_ISREG
 from typing import List, Tuple
 
@@ -61,30 +61,48 @@ class GitResource(Resource):
     ) -> List[FileMetadata]:
         """
         This method calculates the SHA256 hashes of input files.
-        To do so, it reads first the content by using the file blob hash with the command `git cat-file -p [blob hash]`,
-        then it calculates the hash.
-        """
-        files_info: List[Tuple[FilePath, TagName, FilePath]] = []
-        current_dir = os.getcwd()
-        os.chdir(repo_dir_path)
-
-        for (file_path, tag_name, blob_hash) in files:
-            try:
-                # We need to use a subprocess and not the GitPython library
-                # because when we execute "git cat-file -p [blob]" with it, it always removes the \n from the last line.
-                # Because of that when we calculate the hash of a file, it may change if it has originally a \n or not.
-                # (https://github.com/gitpython-developers/GitPython/blob/main/git/cmd.py#L947)
-                file_content = subprocess.check_output(
-                    ['git', 'cat-file', '-p', blob_hash],
-                    shell=False,
-                )
-                if len(file_content) == 0:
-                    continue
-                file_hash = Hash.hash_bytes(file_content)
-                files_info.append((file_path, tag_name, file_hash))
-            except (ValueError, subprocess.CalledProcessError) as exception:
-                logger.error(exception)
-        os.chdir(current_dir)
+        All the contents are streamed from a single `git cat-file --batch` process
+        instead of spawning one `git cat-file -p` per blob.
+        """
+        files_info: List[FileMetadata] = []
+
+        # We need to use a subprocess and not the GitPython library
+        # because when GitPython executes "git cat-file" it always removes the \n from the last line.
+        # Because of that when we calculate the hash of a file, it may change if it has originally a \n or not.
+        # (https://github.com/gitpython-developers/GitPython/blob/main/git/cmd.py#L947)
+        with subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            shell=False,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=repo_dir_path,
+        ) as git_proc, ThreadPoolExecutor() as executor:
+            pending = []
+
+            for (file_path, tag_name, blob_hash) in files:
+                try:
+                    git_proc.stdin.write(f"{blob_hash}\n".encode("utf-8"))
+                    git_proc.stdin.flush()
+
+                    # the batch output is "<sha> blob <size>\n" followed by the content and a newline
+                    header = git_proc.stdout.readline().split()
+                    if len(header) != 3 or header[1] != b"blob":
+                        if len(header) == 3:
+                            # non-blob objects still carry their payload;
+                            # drain it so the stream stays aligned for the next request
+                            git_proc.stdout.read(int(header[2]) + 1)
+                        logger.error(f"Could not retrieve blob {blob_hash} of file {file_path}")
+                        continue
+                    file_content = git_proc.stdout.read(int(header[2]))
+                    git_proc.stdout.read(1)
+
+                    if len(file_content) == 0:
+                        continue
+                    pending.append((file_path, tag_name, executor.submit(Hash.hash_bytes, file_content)))
+                except (OSError, ValueError) as error:
+                    logger.error(f"Error while retrieving blob {blob_hash} of file {file_path}: {error}")
+            git_proc.stdin.close()
+            files_info = [(file_path, tag_name, future.result()) for (file_path, tag_name, future) in pending]
         return files_info
 
     @staticmethod
@@ -153,22 +171,27 @@ class GitResource(Resource):
         This method saves all files with their hash & their versions to the database.
         """
         with session_scope() as session:
-            file_record = {}
-
-            self._database.insert_versions(session, technology, tags)
-            for (file_path, tag_name, file_hash) in files_info:
-                (last_version, last_hash) = file_record.get(file_path) or (None, None)
-
-                self._database.insert_file(session, technology, file_path)
-
-                if last_version is not None:
-                    # We retrieve all the versions between the last version of the file and this one
-                    # and then we add them to the last hash
-                    versions = self._get_diff_versions(last_version, tag_name, tags)
-                    self._database.insert_or_update_hash(session, last_hash, technology, versions)
-
-                self._database.insert_or_update_hash(session, file_hash, technology, [tag_name])
-                file_record[file_path] = (tag_name, file_hash)
+            with session.no_autoflush:
+                file_record = {}
+                hash_rows = []
+
+                self._database.preload_hashes(session, technology)
+                self._database.insert_versions(session, technology, tags)
+                for (file_path, tag_name, file_hash) in files_info:
+                    (last_version, last_hash) = file_record.get(file_path) or (None, None)
+
+                    if last_version is not None:
+                        # We retrieve all the versions between the last version of the file and this one
+                        # and then we add them to the last hash
+                        versions = self._get_diff_versions(last_version, tag_name, tags)
+                        hash_rows.append((last_hash, technology, versions))
+                    else:
+                        # first time we see this file path in the scan
+                        self._database.insert_file(session, technology, file_path)
+
+                    hash_rows.append((file_hash, technology, [tag_name]))
+                    file_record[file_path] = (tag_name, file_hash)
+                self._database.insert_or_update_hashes(session, hash_rows)
 
     @staticmethod
     def _filter_stored_tags(stored_versions: List[VersionTable], found_tags: List[Tag]) -> List[Tag]:
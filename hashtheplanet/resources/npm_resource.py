@@ -88,11 +88,18 @@ class NpmResource(Resource):
         This method saves all files with their hash & their versions to the database.
         """
         with session_scope() as session:
-            self._database.insert_versions(session, npm_module_name, versions)
-            for version, files in files_info.items():
-                for (file_path, file_hash) in files:
-                    self._database.insert_file(session, npm_module_name, file_path)
-                    self._database.insert_or_update_hash(session, file_hash, npm_module_name, [version])
+            with session.no_autoflush:
+                self._database.preload_hashes(session, npm_module_name)
+                self._database.insert_versions(session, npm_module_name, versions)
+
+                seen_paths = set()
+
+                for version, files in files_info.items():
+                    for (file_path, file_hash) in files:
+                        if file_path not in seen_paths:
+                            seen_paths.add(file_path)
+                            self._database.insert_file(session, npm_module_name, file_path)
+                        self._database.insert_or_update_hash(session, file_hash, npm_module_name, [version])
 
     def compute_hashes(self, session_scope, target: str):
         """
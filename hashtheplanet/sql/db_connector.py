@@ -3,24 +3,25 @@ This module handles connections and requests to the database
 """
 # standard imports
 import hashlib
-from json import JSONEncoder, loads
-from typing import List
+from typing import Dict, List, Tuple
 
 # third party imports
 from loguru import logger
-from sqlalchemy import JSON, Column, Text, select, update
-from sqlalchemy.ext.declarative import declarative_base, declared_attr
+from orjson import dumps, loads
+from sqlalchemy import (JSON, Column, Index, Text, bindparam, exists, func, insert, literal_column, or_, select, text,
+                        type_coerce)
+from sqlalchemy.dialects.sqlite import dialect as sqlite_dialect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql.sqltypes import Integer
 
 Base = declarative_base()
 
-class Version(Base):
+class Version(Base): # pylint: disable=too-few-public-methods
     """
     This class is a model for version table
     """
-    @declared_attr
-    def __tablename__(cls): # pylint: disable=no-self-argument
-        return cls.__name__.lower()
+    __tablename__ = "version"
 
     rowid = Column(Integer)
     technology = Column(Text, nullable=False, primary_key=True)
@@ -29,17 +30,19 @@ class Version(Base):
     def __repr__(self):
         return f"Version (technology={self.technology}, version={self.version})"
 
-class File(Base):
+class File(Base): # pylint: disable=too-few-public-methods
     """
     This class is a model for file table
     """
-    @declared_attr
-    def __tablename__(cls): # pylint: disable=no-self-argument
-        return cls.__name__.lower()
+    __tablename__ = "file"
 
     technology = Column(Text, nullable=False, primary_key=True)
     path = Column(Text, nullable=False, primary_key=True)
 
+    # the composite primary key only covers lookups prefixed by technology,
+    # so path-only filters like get_static_files need their own index
+    __table_args__ = (Index("ix_file_path", "path"),)
+
     def __repr__(self):
         return f"File (technology={self.technology}, path={self.path})"
 
@@ -47,14 +50,16 @@ class Hash(Base):
     """
     This class is a model for hash table
     """
-    @declared_attr
-    def __tablename__(cls): # pylint: disable=no-self-argument
-        return cls.__name__.lower()
+    __tablename__ = "hash"
 
     hash = Column(Text, nullable=False, primary_key=True)
     technology = Column(Text, nullable=False)
     versions = Column(JSON, nullable=False)
 
+    # find_hash goes through the primary key; this one serves the
+    # per-technology preload at the start of a scan
+    __table_args__ = (Index("ix_hash_technology", "technology"),)
+
     @staticmethod
     def hash_file(file_path: str) -> str:
         """
@@ -79,32 +84,171 @@ class Hash(Base):
     def __repr__(self):
         return f"Hash (hash={self.hash}, technology={self.technology}, versions={self.versions})"
 
+class HashLookup():
+    """
+    Result of a find_hash lookup.
+    The versions payload is kept as raw JSON text and only decoded
+    on first access, so callers that only read technology pay no JSON cost.
+    """
+    def __init__(self, technology: str, raw_versions: str):
+        self.technology = technology
+        self._raw_versions = raw_versions
+        self._versions = None
+
+    @property
+    def versions(self) -> dict:
+        """
+        Decodes and returns the versions payload.
+        """
+        if self._versions is None:
+            self._versions = loads(self._raw_versions)
+        return self._versions
+
+    def __getitem__(self, index):
+        return (self.technology, self.versions)[index]
+
+    def __repr__(self):
+        return f"HashLookup (technology={self.technology}, versions={self.versions})"
+
+def _build_hash_upsert_stmt():
+    """
+    Builds the UPSERT statement used to save a hash with one version.
+    On conflict, the version is appended to the stored JSON array in SQL,
+    unless it is already present.
+    The JSON paths are inlined as SQL literals so the compiled statement only
+    binds the (hash, technology, versions) row values.
+    """
+    new_version = func.json_extract(literal_column("excluded.versions"), literal_column("'$.versions[0]'"))
+    known_versions = func.json_each(Hash.versions, literal_column("'$.versions'")).table_valued("value")
+
+    return sqlite_insert(Hash).on_conflict_do_update(
+        index_elements=["hash"],
+        set_={"versions": func.json_insert(Hash.versions, literal_column("'$.versions[#]'"), new_version)},
+        where=~exists(select(known_versions.c.value).where(known_versions.c.value == new_version)),
+    )
+
 class DbConnector():
     """
     This class implements method to connect to and request the database.
+
+    The hot statements are built once with bound parameters and reused,
+    so repeated calls skip the Python-side statement construction.
     """
+    _HASH_UPSERT = _build_hash_upsert_stmt()
+
+    # the UPSERT compiled once into its sqlite SQL text, with ? placeholders
+    # for (hash, technology, versions); batches run straight on the DBAPI
+    # cursor without any per-call statement compilation
+    _HASH_UPSERT_SQL = str(_HASH_UPSERT.compile(dialect=sqlite_dialect()))
+
+    _SELECT_HASHES_BY_TECHNOLOGY = select(Hash.hash, Hash.versions) \
+        .where(Hash.technology == bindparam("technology"))
+
+    # single-column LIMIT 1 probes: answered from the primary-key index alone,
+    # while keeping the ORM autoflush that plain exists() selects would skip
+    _VERSION_EXISTS = select(Version.version).where(
+        Version.technology == bindparam("technology"),
+        Version.version == bindparam("version")).limit(1)
+
+    _SELECT_VERSIONS_IN = select(Version.version).where(
+        Version.technology == bindparam("technology"),
+        Version.version.in_(bindparam("versions", expanding=True)))
+
+    # SQLite historically caps a statement at 999 bound variables; the expanding
+    # IN list is chunked below that, minus one slot for the technology bind
+    _MAX_IN_VARIABLES = 998
+
+    _FILE_EXISTS = select(File.path).where(
+        File.technology == bindparam("technology"),
+        File.path == bindparam("path")).limit(1)
+
+    _INSERT_VERSION = insert(Version)
+
+    _INSERT_FILE = insert(File)
+
+    # the versions column is coerced to Text so the row fetch skips the JSON
+    # decode; HashLookup decodes it lazily
+    _SELECT_HASH = select(Hash.technology, type_coerce(Hash.versions, Text)) \
+        .where(Hash.hash == bindparam("hash")).limit(1)
+
+    # databases written by older releases stored the versions column as a
+    # JSON-encoded string instead of a JSON object; unwrapping the string
+    # turns it into the object format the SQL-side json_insert expects
+    _MIGRATE_LEGACY_VERSIONS = text(
+        "UPDATE hash SET versions = json_extract(versions, '$') WHERE json_type(versions) = 'text'")
+
+    def __init__(self):
+        # Per-run cache of the (hash, versions) couples already sent to the database,
+        # used to skip statements for couples we know are stored.
+        self._hash_cache: Dict[str, List[str]] = {}
+
+    @staticmethod
+    def migrate_legacy_versions(session):
+        """
+        Rewrites hash rows written by older releases, where the versions column
+        stored a JSON-encoded string instead of a JSON object.
+        The SQL-side version append is a silent no-op on such rows, so they are
+        normalized once when an existing database is opened.
+        """
+        migrated_rows = session.execute(DbConnector._MIGRATE_LEGACY_VERSIONS).rowcount
+        if migrated_rows > 0:
+            logger.info(f"{migrated_rows} hash rows migrated to the new versions format")
+
+    def preload_hashes(self, session, technology):
+        """
+        Fills the hash cache with all stored hashes of technology in one SELECT,
+        so that a new scan does not re-send already stored (hash, version) couples.
+        """
+        self._hash_cache = {}
+        for (hash_value, versions) in session.execute(
+                DbConnector._SELECT_HASHES_BY_TECHNOLOGY, {"technology": technology}):
+            if isinstance(versions, str):
+                # legacy row that migrate_legacy_versions has not rewritten yet:
+                # the column held a JSON-encoded string instead of an object
+                versions = loads(versions)
+            self._hash_cache[hash_value] = list(versions["versions"])
+
     @staticmethod
     def insert_version(session, technology, version):
         """
         Insert a new version related to technology in version table if it does not exist yet.
+        The existence check only fetches a boolean, not the full row.
         """
-        stmt = select(Version).filter_by(technology=technology, version=str(version))
-        entry = session.execute(stmt).scalar_one_or_none()
+        already_stored = session.execute(
+            DbConnector._VERSION_EXISTS, {"technology": technology, "version": str(version)}
+        ).scalar() is not None
 
-        if not entry:
-            new_version = Version(technology=technology, version=str(version))
-            session.add(new_version)
-            logger.info(f"Entry {new_version} added to version database")
+        if not already_stored:
+            session.execute(DbConnector._INSERT_VERSION, {"technology": technology, "version": str(version)})
+            logger.info(f"Version (technology={technology}, version={version}) added to version database")
         else:
-            logger.debug(f"Entry {entry} already exists in versions database")
+            logger.debug(f"Version (technology={technology}, version={version}) already exists in versions database")
 
     @staticmethod
     def insert_versions(session, technology, versions):
         """
-        Insert a list of versions related to technology.
+        Insert a list of versions related to technology in one bulk statement.
+        Already stored versions are filtered out with a single SELECT beforehand.
         """
-        for _, version in enumerate(versions):
-            DbConnector.insert_version(session, technology, version)
+        version_names = list(dict.fromkeys(str(version) for version in versions))
+
+        existing_versions = set()
+        for offset in range(0, len(version_names), DbConnector._MAX_IN_VARIABLES):
+            existing_versions.update(session.execute(
+                DbConnector._SELECT_VERSIONS_IN,
+                {"technology": technology,
+                 "versions": version_names[offset:offset + DbConnector._MAX_IN_VARIABLES]}
+            ).scalars().all())
+
+        values = [
+            {"technology": technology, "version": version}
+            for version in version_names if version not in existing_versions
+        ]
+        if not values:
+            logger.debug(f"All versions of {technology} already exist in versions database")
+            return
+        session.execute(DbConnector._INSERT_VERSION, values)
+        logger.info(f"{len(values)} versions of {technology} added to version database")
 
     @staticmethod
     def get_versions(session, technology):
@@ -119,58 +263,76 @@ class DbConnector():
     def insert_file(session, technology, path):
         """
         Insert a new file related to technology in file table if it does not exist yet.
+        The existence check only fetches a boolean, not the full row.
         """
-        stmt = select(File).filter_by(technology=technology, path=path)
-        entry = session.execute(stmt).scalar_one_or_none()
+        already_stored = session.execute(
+            DbConnector._FILE_EXISTS, {"technology": technology, "path": path}
+        ).scalar() is not None
 
-        if not entry:
-            new_file = File(technology=technology, path=path)
-            session.add(new_file)
-            logger.debug(f"Entry {new_file} added to file database")
+        if not already_stored:
+            session.execute(DbConnector._INSERT_FILE, {"technology": technology, "path": path})
+            logger.debug(f"File (technology={technology}, path={path}) added to file database")
         else:
-            logger.debug(f"Entry {entry} already exists in files database")
+            logger.debug(f"File (technology={technology}, path={path}) already exists in files database")
 
-    @staticmethod
-    def insert_or_update_hash(session, hash_value: str, technology: str, versions: List[str]):
+    def insert_or_update_hash(self, session, hash_value: str, technology: str, versions: List[str]):
         """
         Insert a new hash related to technology and version in hash table if it does not exist yet.
-        If it already exists, update related versions.
+        If it already exists, the missing versions are appended to the stored ones,
+        with a single UPSERT instead of a SELECT + UPDATE round-trip.
         """
-        stmt = select(Hash).filter_by(hash=hash_value)
-        entry = session.execute(stmt).scalar_one_or_none()
+        self.insert_or_update_hashes(session, [(hash_value, technology, versions)])
 
-        if not entry:
-            new_hash = Hash(hash=hash_value, technology=technology, versions=JSONEncoder() \
-                .encode({"versions": versions}))
-            session.add(new_hash)
-            logger.debug(f"Entry {new_hash} added to hash database")
-        else:
-            existing_versions: List[str] = loads(entry.versions)["versions"]
+    def insert_or_update_hashes(self, session, hashes: List[Tuple[str, str, List[str]]]):
+        """
+        Saves a batch of (hash, technology, versions) rows at once.
+        The whole batch goes through a single UPSERT executed with executemany,
+        instead of one insert_or_update_hash round-trip per row.
+        Couples already present in the hash cache are filtered out beforehand.
+        """
+        values = []
+
+        for (hash_value, technology, versions) in hashes:
+            known_versions = self._hash_cache.setdefault(hash_value, [])
 
             for version in versions:
-                if version not in existing_versions:
-                    existing_versions.append(version)
-            stmt = update(Hash).where(Hash.hash==hash_value) \
-                .values(versions=JSONEncoder().encode({"versions": existing_versions})) \
-                    .execution_options(synchronize_session="fetch")
-            session.execute(stmt)
-            logger.debug(f"Entry {entry} updated with new versions {versions}")
+                if version in known_versions:
+                    continue
+                known_versions.append(version)
+                values.append((hash_value, technology, dumps({"versions": [version]}).decode("utf-8")))
+        if not values:
+            return
+        # pending ORM rows must reach the database before the raw cursor writes
+        session.flush()
+
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.executemany(DbConnector._HASH_UPSERT_SQL, values)
+        finally:
+            cursor.close()
+        logger.debug(f"{len(values)} hash versions saved to hash database")
 
     @staticmethod
     def get_all_hashs(session):
         """
-        Returns all the hashs already computed.
+        Returns all the hashs already computed, as an iterable of
+        (hash, technology, versions) rows streamed by batches of 1000
+        instead of one list of ORM objects.
         """
-        stmt = select(Hash)
-        hashs = session.execute(stmt).scalars().all()
-        return hashs
+        stmt = select(Hash.hash, Hash.technology, Hash.versions).execution_options(yield_per=1000)
+        return session.execute(stmt)
 
     @staticmethod
     def find_hash(session, hash_str: str):
         """
-        Returns a technology and its versions from a hash.
+        Returns a technology and its versions from a hash, as a HashLookup,
+        or None if the hash is unknown.
         """
-        return session.query(Hash.technology, Hash.versions).filter(Hash.hash == hash_str).first()
+        row = session.execute(DbConnector._SELECT_HASH, {"hash": hash_str}).first()
+
+        if row is None:
+            return None
+        return HashLookup(row[0], row[1])
 
     @staticmethod
     def get_static_files(session):
@@ -179,5 +341,8 @@ class DbConnector():
         """
         static_files_query = session \
                             .query(File.path) \
-                            .filter(File.path.regexp_match(r"([a-zA-Z0-9\s_\\.\-\(\):])+(.html|.md|.txt)$"))
+                            .filter(or_(
+                                File.path.like("%.html"),
+                                File.path.like("%.md"),
+                                File.path.like("%.txt")))
         return [path for path, in static_files_query]
@@ -100,7 +100,7 @@ def test_show_all_hashs():
 
         mock_info_logger.assert_not_called()
 
-    with mock.patch.object(DbConnector, "get_all_hashs", return_value=None) as mock_get_all_hashes, \
+    with mock.patch.object(DbConnector, "get_all_hashs", return_value=[]) as mock_get_all_hashes, \
         mock.patch.object(logger, "success") as mock_success_logger, \
         mock.patch.object(logger, "info") as mock_info_logger:
         htp.show_all_hashs()
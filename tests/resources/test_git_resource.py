@@ -18,13 +18,51 @@ from git.exc import GitCommandError
 from git.objects.commit import Commit
 
 
-def subprocess_mock(blobs: Dict[str, str]):
-    def subprocess_mock(cmd_args, *args, **kwargs):
-        for expected_filename, content in blobs.items():
-            if cmd_args[3] == expected_filename:
-                return blobs[expected_filename]
-        raise FileNotFoundError('(mock) Unable to retrieve {cmd_args}')
-    return MagicMock(side_effect=subprocess_mock)
+class GitCatFileMock():
+    """
+    Mimics a `git cat-file --batch` process: each blob hash written on stdin
+    feeds the matching batch answer on stdout.
+    """
+    def __init__(self, blobs: Dict[str, bytes], object_types: Dict[str, str] = None):
+        self._blobs = blobs
+        self._object_types = object_types or {}
+        self._buffer = b""
+        self.stdin = self
+        self.stdout = self
+        self.write_count = 0
+
+    def write(self, data: bytes):
+        blob_hash = data.decode("utf-8").strip()
+        content = self._blobs.get(blob_hash)
+
+        self.write_count += 1
+        if content is None:
+            self._buffer += f"{blob_hash} missing\n".encode("utf-8")
+        else:
+            object_type = self._object_types.get(blob_hash, "blob")
+            self._buffer += f"{blob_hash} {object_type} {len(content)}\n".encode("utf-8") + content + b"\n"
+
+    def readline(self) -> bytes:
+        return self.read(self._buffer.find(b"\n") + 1)
+
+    def read(self, size: int) -> bytes:
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+def subprocess_mock(blobs: Dict[str, bytes], object_types: Dict[str, str] = None):
+    return MagicMock(return_value=GitCatFileMock(blobs, object_types))
 
 def test_clone_repository():
     """
@@ -80,7 +118,6 @@ def test_hash_files():
         "empty_blob": "".encode("utf-8"),
         "d159169d1050894d3ea3b98e1c965c4058208fe1": "license content".encode("utf-8"),
         "e42f952edc48e2c085c206166bf4f1ead4d4b058": "setup.cfg content".encode("utf-8"),
-        "empty": ""
     }
 
     git_files_metadata = [
@@ -91,18 +128,19 @@ def test_hash_files():
 
     git_resource = GitResource(None)
 
-    with mock.patch("subprocess.check_output", subprocess_mock(blobs)) as sp_mock, \
-        mock.patch("os.getcwd", return_value="/foobar/") as getcwd_mock, \
-        mock.patch("os.chdir", return_value=None) as chdir_mock:
+    with mock.patch("subprocess.Popen", subprocess_mock(blobs)) as sp_mock:
         files_metadata = git_resource._hash_files(git_files_metadata, "repo_dir_path")
 
-        assert sp_mock.call_count == 3
-        sp_mock.assert_called_with(['git', 'cat-file', '-p', 'e42f952edc48e2c085c206166bf4f1ead4d4b058'], shell=False)
-
-        getcwd_mock.assert_called_once()
-
-        assert chdir_mock.call_count == 2
-        chdir_mock.assert_called_with("/foobar/")
+        # one single batch process for the whole file list, running in the repository
+        sp_mock.assert_called_once_with(
+            ['git', 'cat-file', '--batch'],
+            shell=False,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd="repo_dir_path",
+        )
+        # one stdin line written per blob
+        assert sp_mock.return_value.write_count == 3
 
         assert len(files_metadata) == 2
 
@@ -115,34 +153,35 @@ def test_hash_files():
         assert files_metadata[1][2] == hashlib.sha256(blobs.get("e42f952edc48e2c085c206166bf4f1ead4d4b058")).hexdigest()
 
 
-    with mock.patch("subprocess.check_output", subprocess_mock(blobs)) as sp_mock, \
-        mock.patch("os.getcwd", return_value="/foobar/") as getcwd_mock, \
-        mock.patch("os.chdir", return_value=None) as chdir_mock:
-        files_metadata = git_resource._hash_files([["empty", "1.2.1", "empty"]], "repo_dir_path")
+    with mock.patch("subprocess.Popen", subprocess_mock(blobs)) as sp_mock:
+        files_metadata = git_resource._hash_files([["empty", "1.2.1", "empty_blob"]], "repo_dir_path")
 
-        assert sp_mock.call_count == 1
-        sp_mock.assert_called_with(['git', 'cat-file', '-p', 'empty'], shell=False)
+        sp_mock.assert_called_once()
 
-        getcwd_mock.assert_called_once()
+        assert not len(files_metadata)
 
-        assert chdir_mock.call_count == 2
-        chdir_mock.assert_called_with("/foobar/")
 
-        assert not len(files_metadata)
+    with mock.patch("subprocess.Popen", subprocess_mock({})) as sp_mock:
+        # unknown blobs are answered with "<sha> missing" and skipped
+        files_metadata = git_resource._hash_files(git_files_metadata, "repo_dir_path")
 
+        assert not len(files_metadata)
 
-    with mock.patch.object(subprocess, "check_output", MagicMock(side_effect=ValueError("error"))) as mock_exec, \
-        mock.patch("os.getcwd", return_value="/foobar/") as getcwd_mock, \
-        mock.patch("os.chdir", return_value=None) as chdir_mock:
-        git_resource._hash_files(git_files_metadata, "repo_dir_path")
 
-        getcwd_mock.assert_called_once()
+    tag_metadata = [
+        ["v1.2.3", "1.2.3", "annotated_tag"],
+        ["LICENSE", "1.2.3", "d159169d1050894d3ea3b98e1c965c4058208fe1"],
+    ]
+    tag_blobs = dict(blobs, annotated_tag="tag payload".encode("utf-8"))
 
-        assert chdir_mock.call_count == 2
-        chdir_mock.assert_called_with("/foobar/")
+    with mock.patch("subprocess.Popen", subprocess_mock(tag_blobs, {"annotated_tag": "tag"})) as sp_mock:
+        # non-blob objects are skipped but their payload is drained,
+        # so the following blobs are still read correctly
+        files_metadata = git_resource._hash_files(tag_metadata, "repo_dir_path")
 
-        mock_exec.assert_called()
-        assert mock_exec.call_count == 3
+        assert len(files_metadata) == 1
+        assert files_metadata[0][0] == "LICENSE"
+        assert files_metadata[0][2] == hashlib.sha256(blobs.get("d159169d1050894d3ea3b98e1c965c4058208fe1")).hexdigest()
 
 
 def test_get_changes_between_two_tags():
@@ -275,16 +314,23 @@ def test_save_hashes(dbsession):
 
     with mock.patch.object(DbConnector, "insert_versions", MagicMock()) as db_insert_v, \
         mock.patch.object(DbConnector, "insert_file", MagicMock()) as db_insert_f, \
-        mock.patch.object(DbConnector, "insert_or_update_hash", MagicMock()) as db_insert_h:
+        mock.patch.object(DbConnector, "insert_or_update_hashes", MagicMock()) as db_insert_h:
         git_resource._save_hashes(session_scope, files_metadata, tags, "foobar")
 
         db_insert_v.assert_called_once()
 
+        # insert_file is only called on the first occurrence of each path
         assert db_insert_f.called is True
-        assert db_insert_f.call_count == 3
-
-        assert db_insert_h.called is True
-        assert db_insert_h.call_count == 4
+        assert db_insert_f.call_count == 2
+
+        db_insert_h.assert_called_once()
+        hash_rows = db_insert_h.call_args[0][1]
+        assert hash_rows == [
+            ("license_hash", "foobar", ["1.2.3"]),
+            ("setup_hash", "foobar", ["1.2.3"]),
+            ("license_hash", "foobar", ["1.2.3"]),
+            ("license_modified_hash", "foobar", ["1.2.4"])
+        ]
 
 def test_filter_stored_tags():
     """
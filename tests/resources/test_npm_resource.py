@@ -137,6 +137,9 @@ def test_save_hashes():
         def __init__(self, session) -> None:
             self.session = session
 
+        def preload_hashes(self, session, module_name):
+            assert module_name == npm_module_name
+
         def insert_versions(self, session, module_name, module_versions):
             assert module_name == npm_module_name
             assert module_versions == versions
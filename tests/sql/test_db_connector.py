@@ -2,7 +2,6 @@
 Unit tests for DbConnector class.
 """
 #standard imports
-from json import JSONEncoder
 from typing import Dict
 from unittest import mock
 from unittest.mock import MagicMock, mock_open
@@ -71,6 +70,25 @@ def test_insert_versions(dbsession):
         assert inserted_versions[idx].version == versions[idx]
 
 
+def test_insert_versions_already_added_versions(dbsession):
+    """
+    Unit tests for insert_versions method.
+    If some versions were already added for this techno,
+    it ensures that only the new ones are added.
+    """
+
+    techno = "jQuery"
+    versions = ["1.2.3", "1.3.4", "1.3.5"]
+
+    DbConnector().insert_versions(dbsession, techno, versions[:2])
+    DbConnector().insert_versions(dbsession, techno, versions)
+
+    inserted_versions = dbsession.query(Version)
+    assert inserted_versions.count() == 3
+    for idx, _ in enumerate(inserted_versions):
+        assert inserted_versions[idx].version == versions[idx]
+
+
 def test_get_versions(dbsession):
     """
     Unit tests for get_versions method.
@@ -116,12 +134,12 @@ def test_insert_or_update_hash(dbsession):
     techno = "jQuery"
     versions = ["1.2.3", "1.3.4"]
 
-    DbConnector.insert_or_update_hash(dbsession, hash_value, techno, [versions[0]])
+    DbConnector().insert_or_update_hash(dbsession, hash_value, techno, [versions[0]])
 
     inserted_hash = dbsession.query(Hash).first()
     assert inserted_hash.hash == hash_value
     assert inserted_hash.technology == techno
-    assert inserted_hash.versions == JSONEncoder().encode({"versions": [versions[0]]})
+    assert inserted_hash.versions == {"versions": [versions[0]]}
 
 
 def test_insert_or_update_hash_already_added_hash(dbsession):
@@ -135,12 +153,13 @@ def test_insert_or_update_hash_already_added_hash(dbsession):
     techno = "jQuery"
     versions = ["1.2.3", "1.3.4"]
 
-    DbConnector.insert_or_update_hash(dbsession, hash_value, techno, [versions[0]])
-    DbConnector.insert_or_update_hash(dbsession, hash_value, techno, [versions[1]])
+    # separate connectors to exercise the SQL-side merge, not the hash cache
+    DbConnector().insert_or_update_hash(dbsession, hash_value, techno, [versions[0]])
+    DbConnector().insert_or_update_hash(dbsession, hash_value, techno, [versions[1]])
     # hash already added but not this version
     inserted_hash = dbsession.query(Hash)
     assert inserted_hash.count() == 1
-    assert inserted_hash[0].versions == JSONEncoder().encode({"versions": versions})
+    assert inserted_hash[0].versions == {"versions": versions}
 
 
 def test_insert_or_update_hash_already_added_hash_and_version(dbsession):
@@ -154,13 +173,103 @@ def test_insert_or_update_hash_already_added_hash_and_version(dbsession):
     techno = "jQuery"
     versions = ["1.2.3", "1.3.4"]
 
-    DbConnector.insert_or_update_hash(dbsession, hash_value, techno, [versions[0]])
-    DbConnector.insert_or_update_hash(dbsession, hash_value, techno, [versions[1]])
-    DbConnector.insert_or_update_hash(dbsession, hash_value, techno, [versions[1]])
+    # separate connectors to exercise the SQL-side merge, not the hash cache
+    DbConnector().insert_or_update_hash(dbsession, hash_value, techno, [versions[0]])
+    DbConnector().insert_or_update_hash(dbsession, hash_value, techno, [versions[1]])
+    DbConnector().insert_or_update_hash(dbsession, hash_value, techno, [versions[1]])
     # hash and version already added
     inserted_hash = dbsession.query(Hash)
     assert inserted_hash.count() == 1
-    assert inserted_hash[0].versions == JSONEncoder().encode({"versions": versions})
+    assert inserted_hash[0].versions == {"versions": versions}
+
+
+def test_insert_or_update_hashes(dbsession):
+    """
+    Unit tests for insert_or_update_hashes method.
+    It ensures that a batch of rows is saved in one call,
+    with the same merge behavior as insert_or_update_hash.
+    """
+
+    hashs = ["abcdef0123456789", "0123456789abcdef"]
+    techno = "jQuery"
+    versions = ["1.2.3", "1.3.4"]
+
+    DbConnector().insert_or_update_hashes(dbsession, [
+        (hashs[0], techno, [versions[0]]),
+        (hashs[1], techno, [versions[0]]),
+        (hashs[0], techno, versions)
+    ])
+
+    inserted_hashs = dbsession.query(Hash)
+    assert inserted_hashs.count() == 2
+    assert inserted_hashs[0].versions == {"versions": versions}
+    assert inserted_hashs[1].versions == {"versions": [versions[0]]}
+
+
+def test_preload_hashes(dbsession):
+    """
+    Unit tests for preload_hashes method.
+    Once preloaded, already stored (hash, version) couples are filtered out
+    before reaching the database.
+    """
+
+    hash_value = "ab78a59a6f2fbacdceb42bc4b6f1aeff0445d119a83128a20786d34bc3f64527"
+    techno = "jQuery"
+    versions = ["1.2.3", "1.3.4"]
+
+    dbsession.add(Hash(hash=hash_value, technology=techno, versions={"versions": [versions[0]]}))
+
+    db_connector = DbConnector()
+    db_connector.preload_hashes(dbsession, techno)
+
+    with mock.patch.object(dbsession, "execute", MagicMock()) as execute_mock:
+        db_connector.insert_or_update_hash(dbsession, hash_value, techno, [versions[0]])
+        execute_mock.assert_not_called()
+
+    db_connector.insert_or_update_hash(dbsession, hash_value, techno, [versions[1]])
+
+    inserted_hash = dbsession.query(Hash).first()
+    assert inserted_hash.versions == {"versions": versions}
+
+    # a not yet migrated legacy row, stored as a JSON-encoded string,
+    # must feed the cache like a native one
+    dbsession.add(Hash(hash="legacy_hash", technology=techno, versions='{"versions": ["1.0.0"]}'))
+    db_connector.preload_hashes(dbsession, techno)
+
+    with mock.patch.object(dbsession, "execute", MagicMock()) as execute_mock:
+        db_connector.insert_or_update_hash(dbsession, "legacy_hash", techno, ["1.0.0"])
+        execute_mock.assert_not_called()
+
+
+def test_migrate_legacy_versions(dbsession):
+    """
+    Unit tests for migrate_legacy_versions method.
+    Rows written by older releases store the versions column as a JSON-encoded
+    string; after the migration they behave like newly written rows.
+    """
+    techno = "jQuery"
+
+    # older releases passed an already encoded payload through the JSON column,
+    # storing it as a JSON string instead of a JSON object
+    dbsession.add(Hash(hash="legacy_hash", technology=techno, versions='{"versions": ["1.2.3"]}'))
+    dbsession.add(Hash(hash="new_hash", technology=techno, versions={"versions": ["1.3.4"]}))
+    dbsession.flush()
+
+    DbConnector.migrate_legacy_versions(dbsession)
+    dbsession.expire_all()
+
+    retrieved_hashs = {row.hash: row.versions for row in dbsession.query(Hash)}
+    assert retrieved_hashs["legacy_hash"] == {"versions": ["1.2.3"]}
+    assert retrieved_hashs["new_hash"] == {"versions": ["1.3.4"]}
+
+    # a migrated row accepts new versions again
+    db_connector = DbConnector()
+    db_connector.preload_hashes(dbsession, techno)
+    db_connector.insert_or_update_hash(dbsession, "legacy_hash", techno, ["9.9.9"])
+    dbsession.expire_all()
+
+    migrated_hash = dbsession.query(Hash).filter_by(hash="legacy_hash").one()
+    assert migrated_hash.versions == {"versions": ["1.2.3", "9.9.9"]}
 
 
 def test_get_all_hashs(dbsession):
@@ -172,17 +281,15 @@ def test_get_all_hashs(dbsession):
     techno = "jQuery"
     versions = ["1.2.3", "1.3.4"]
 
-    dbsession.add(Hash(hash=hashs[0], technology=techno, versions=JSONEncoder() \
-                .encode({"versions": [versions[0]]})))
-    dbsession.add(Hash(hash=hashs[1], technology=techno, versions=JSONEncoder() \
-                .encode({"versions": [versions[1]]})))
+    dbsession.add(Hash(hash=hashs[0], technology=techno, versions={"versions": [versions[0]]}))
+    dbsession.add(Hash(hash=hashs[1], technology=techno, versions={"versions": [versions[1]]}))
 
-    retrieved_hashs = DbConnector.get_all_hashs(dbsession)
+    retrieved_hashs = list(DbConnector.get_all_hashs(dbsession))
     assert len(retrieved_hashs) == 2
     for idx, _ in enumerate(retrieved_hashs):
         assert retrieved_hashs[idx].hash == hashs[idx]
         assert retrieved_hashs[idx].technology == techno
-        assert retrieved_hashs[idx].versions == JSONEncoder().encode({"versions": [versions[idx]]})
+        assert retrieved_hashs[idx].versions == {"versions": [versions[idx]]}
 
 def test_find_hash(dbsession):
     """
@@ -192,16 +299,14 @@ def test_find_hash(dbsession):
     techno = "jQuery"
     versions = ["1.2.3", "1.3.4"]
 
-    dbsession.add(Hash(hash=hashs[0], technology=techno, versions=JSONEncoder() \
-                .encode({"versions": [versions[0]]})))
-    dbsession.add(Hash(hash=hashs[1], technology=techno, versions=JSONEncoder() \
-                .encode({"versions": [versions[1]]})))
+    dbsession.add(Hash(hash=hashs[0], technology=techno, versions={"versions": [versions[0]]}))
+    dbsession.add(Hash(hash=hashs[1], technology=techno, versions={"versions": [versions[1]]}))
 
     result = DbConnector.find_hash(dbsession, "0123456789abcdef")
 
     assert result is not None
     assert result[0] == "jQuery"
-    assert result[1] == '{"versions": ["1.3.4"]}'
+    assert result[1] == {"versions": ["1.3.4"]}
 
 def test_get_static_files(dbsession):
     """
@@ -215,9 +320,7 @@ def test_get_static_files(dbsession):
     static_files = DbConnector.get_static_files(dbsession)
 
     assert len(static_files) == 3
-    assert static_files[0] == "license.txt"
-    assert static_files[1] == "README.md"
-    assert static_files[2] == "index.html"
+    assert sorted(static_files) == ["README.md", "index.html", "license.txt"]
 
 def test_hash_file():
     """